@@ -6,20 +6,448 @@ Classes:
     * PlotSystemWRTTime: Plots ODEs wrt time
     * PhasePlaneTwoByTwoWithCarry: Plots a 2D phase plane
 
+Functions:
+    * rk4_system: Numba-compiled fixed-step integrator driver
+
 Todo:
     * Forward Euler
     * Break out constructors into discrete methods
 """
 
 
+import functools
+import math
+import re
+import sys
+import warnings
+
 import numpy as np
-import plotly as py
-import pandas as pd
 import plotly.graph_objs as go
 import plotly.figure_factory as ff
+import plotly.io as pio
 from scipy.integrate import odeint
 
 
+# Axis styling common to x and y; they differ only in tick placement
+_AXIS_COMMON = dict(
+    showgrid=False,
+    titlefont=dict(
+        size=20,
+    ),
+    tickfont=dict(
+        size=14,
+    ),
+    zerolinewidth=1,
+)
+
+# Figure styling shared by every class; titles and labels are per plot.
+# Built on Plotly's default theme so its colorway and background remain
+_BASE_LAYOUT = go.layout.Template(pio.templates['plotly'])
+_BASE_LAYOUT.layout.update(
+    autosize=True,
+
+    font=dict(
+        size=22,
+    ),
+
+    xaxis=dict(ticks='outside', **_AXIS_COMMON),
+    yaxis=dict(ticks='inside', **_AXIS_COMMON),
+)
+
+# Legend for plots with one trace per variable
+_LEGEND = dict(
+    x=1,
+    y=1,
+    bordercolor='#404040',
+    bgcolor="rgba(255, 255, 255, 0.5)",
+    borderwidth=1,
+    font=dict(size=16),
+    xanchor='right',
+    yanchor='top',
+)
+
+
+def _make_layout(title, x_label, y_label, **kwargs):
+    """
+    Returns a go.Layout on the shared _BASE_LAYOUT template with the given
+    title and axis labels. Extra keyword arguments are passed through.
+    """
+    return go.Layout(template=_BASE_LAYOUT,
+                     title=title,
+                     xaxis=dict(title=x_label),
+                     yaxis=dict(title=y_label),
+                     **kwargs)
+
+
+def _html_filename(title):
+    """
+    Returns title + '.html' with the characters Windows forbids in file
+    names (and any trailing dots or spaces) removed, so figures can be
+    written under their plot titles on every platform.
+    """
+    name = re.sub(r'[<>:"/\\|?*\x00-\x1f]', '', title).rstrip('. ')
+
+    return (name or 'figure') + '.html'
+
+
+@functools.lru_cache(maxsize=16)
+def _time_grid(x_start, x_end, steps):
+    """
+    Returns (t, h), the steps+1 evenly spaced points from x_start to
+    x_end and their spacing. Cached, so t is read-only and shared.
+    """
+    t, h = np.linspace(x_start, x_end, steps+1, retstep=True)
+    t.flags.writeable = False
+
+    return t, h
+
+
+def rk4_system(step, y0, t, h):
+    """
+    Integrates a system over the evenly spaced grid t with step h.
+    step(y, t, h) must be a Numba-compiled function advancing the state
+    tuple y by one step, such as those generated by _rk4_step, and y0 a
+    tuple of floats. Requires numba; the driver is compiled on first use.
+
+    Returns an array of shape (len(t), len(y0)), one row per time point.
+    """
+    return _rk4_driver()(step, y0, t, h)
+
+
+@functools.lru_cache(maxsize=1)
+def _rk4_driver():
+    """
+    Imports numba and compiles _rk4_loop, once.
+    """
+    from numba import njit
+
+    return njit(fastmath={'contract'})(_rk4_loop)
+
+
+def _rk4_loop(step, y0, t, h):
+    """
+    The body of rk4_system, compiled by _rk4_driver.
+    """
+    out = np.empty((len(t), len(y0)))
+    y = y0
+    for j in range(len(y)):
+        out[0, j] = y[j]
+
+    for i in range(len(t)-1):
+        y = step(y, t[i], h)
+        for j in range(len(y)):
+            out[i+1, j] = y[j]
+
+    return out
+
+
+class _ByValue(object):
+    """
+    Wraps an argument of the compile caches so it hashes and compares by
+    _eqn_key(value) instead of by identity.
+    """
+    __slots__ = ("value", "key")
+
+    def __init__(self, value):
+        self.value = value
+        self.key = _eqn_key(value)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
+def _eqn_key(eqn):
+    """
+    Returns a hashable key for eqn, a lambda or a (nested) tuple of them.
+    Functions are keyed on their code, defaults, the values they close
+    over and the module globals they read, all of which Numba and JAX
+    bake in when compiling. Lambdas rebuilt with the same parameters on
+    every call share a key, while closures over different parameters, or
+    a global changed between plots, do not. Functions reading unhashable
+    values, and anything else (e.g. sympy expressions), are their own key.
+    """
+    if isinstance(eqn, tuple):
+        return tuple(_eqn_key(e) for e in eqn)
+
+    code = getattr(eqn, "__code__", None)
+    if code is None:
+        return eqn
+
+    try:
+        key = (code, eqn.__defaults__,
+               tuple(sorted((eqn.__kwdefaults__ or {}).items())),
+               tuple(_eqn_key(c.cell_contents) for c in eqn.__closure__ or ()),
+               tuple((name, _eqn_key(eqn.__globals__[name]))
+                     for name in code.co_names if name in eqn.__globals__))
+        hash(key)
+    except (TypeError, ValueError):
+        return eqn
+
+    return key
+
+
+def _memoize_eqns(maxsize):
+    """
+    Like functools.lru_cache(maxsize), but looks positional arguments up
+    by _eqn_key, so replotting a system with freshly built but equal
+    lambdas reuses what was compiled for the previous ones.
+    """
+    def decorate(func):
+        @functools.lru_cache(maxsize=maxsize)
+        def cached(*args, **kwargs):
+            return func(*(arg.value for arg in args), **kwargs)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cached(*(_ByValue(arg) for arg in args), **kwargs)
+
+        wrapper.cache_info = cached.cache_info
+        wrapper.cache_clear = cached.cache_clear
+        return wrapper
+
+    return decorate
+
+
+@_memoize_eqns(maxsize=32)
+def _rk4_step(eqn_list):
+    """
+    Generates and compiles step(y, t, h), one classical RK4 step for the
+    lambdas in eqn_list, specialized to their number of variables. The
+    state is a tuple and every stage is a local scalar, so no arrays are
+    allocated per step.
+
+    eqn_list must be a tuple. Results are memoized with _memoize_eqns,
+    so replotting a system whose lambdas have the same code, closure
+    values and globals skips recompilation.
+    """
+    n = len(eqn_list)
+    xs = ["x{}".format(j+1) for j in range(n)]
+
+    def stage(k, args):
+        return ["    k{}_{} = e{}({})".format(k, j+1, j, ", ".join(args))
+                for j in range(n)]
+
+    def shift(k, scale):
+        return ["    a{0} = x{0} + {1}*k{2}_{0}".format(j+1, scale, k)
+                for j in range(n)]
+
+    args = ["a{}".format(j+1) for j in range(n)]
+    lines = ["def step(y, t, h):", "    {}, = y".format(", ".join(xs))]
+    lines += stage(1, xs)
+    lines += shift(1, "0.5*h") + stage(2, args)
+    lines += shift(2, "0.5*h") + stage(3, args)
+    lines += shift(3, "h") + stage(4, args)
+    lines.append("    return ({},)".format(", ".join(
+        "x{0} + h/6*(k1_{0} + 2*k2_{0} + 2*k3_{0} + k4_{0})".format(j+1)
+        for j in range(n))))
+
+    from numba import njit
+
+    namespace = {"e{}".format(i): njit(eqn) for i, eqn in enumerate(eqn_list)}
+    exec("\n".join(lines) + "\n", namespace)
+
+    return njit(fastmath={'contract'})(namespace["step"])
+
+
+@functools.lru_cache(maxsize=32)
+def _lambdify(expr, n, modules="math"):
+    """
+    Converts a sympy expression in x1, ..., x_N into an equivalent
+    function of those variables, built on modules ("math" for Numba and
+    the interpreter, "jax" for JAX). Memoized on the expression, which
+    sympy hashes by value, so the compiled RHS caches still hit.
+    """
+    import sympy
+
+    syms = sympy.symbols("x1:{}".format(n+1))
+    if not expr.free_symbols <= set(syms):
+        raise ValueError( "Equations may only use the symbols x1, ..., x{}. \
+                           Found: {}".format(n, expr.free_symbols) )
+
+    return sympy.lambdify(syms, expr, modules=modules)
+
+
+def _as_lambdas(eqn_list, modules="math"):
+    """
+    Returns eqn_list as a tuple of functions of x1, ..., x_N, converting
+    any sympy expressions with _lambdify. sympy is only consulted if
+    already imported, since otherwise no expression can exist.
+    """
+    sympy = sys.modules.get("sympy")
+    if sympy is None:
+        return tuple(eqn_list)
+
+    return tuple(_lambdify(eqn, len(eqn_list), modules)
+                 if isinstance(eqn, sympy.Basic) else eqn
+                 for eqn in eqn_list)
+
+
+@_memoize_eqns(maxsize=32)
+def _fuse_rhs(eqn_list, jit=False):
+    """
+    Generates a single function _rhs(y, t, out) that reads the state
+    into locals x1, ..., x_N once, evaluates every lambda in eqn_list
+    and writes the results into the buffer out.
+
+    With jit=True both the lambdas and _rhs are compiled with Numba, so
+    each call made by the integrator runs as native code. eqn_list must
+    be a tuple; see _rk4_step for the memoization.
+    """
+    n = len(eqn_list)
+    xs = ", ".join("x{}".format(i+1) for i in range(n))
+
+    if jit:
+        from numba import njit
+
+        unpack = "".join("y[{}], ".format(i) for i in range(n))
+        namespace = {"e{}".format(i): njit(eqn)
+                     for i, eqn in enumerate(eqn_list)}
+    else:
+        # Python floats keep the lambdas' arithmetic far cheaper than
+        # the NumPy scalars that indexing y would hand them
+        unpack = "y.tolist()"
+        namespace = {"e{}".format(i): eqn for i, eqn in enumerate(eqn_list)}
+
+    src = "def _rhs(y, t, out):\n    {}, = {}\n".format(xs, unpack)
+    src += "".join("    out[{0}] = e{0}({1})\n".format(i, xs) for i in range(n))
+    exec(src, namespace)
+
+    return njit(namespace["_rhs"]) if jit else namespace["_rhs"]
+
+
+@_memoize_eqns(maxsize=32)
+def _fuse_jac(jac_list, jit=False):
+    """
+    Generates _jac(y, t, out) filling out[i, j] with jac_list[i][j], a
+    lambda of x1, ..., x_N giving d eqn_i / d x_j, in place. jac_list
+    must be a tuple of tuples; jit is as for _fuse_rhs.
+    """
+    if jit:
+        from numba import njit
+
+    n = len(jac_list)
+    xs = ", ".join("x{}".format(i+1) for i in range(n))
+    unpack = ("".join("y[{}], ".format(i) for i in range(n)) if jit
+              else "y.tolist()")
+
+    src = "def _jac(y, t, out):\n    {}, = {}\n".format(xs, unpack)
+    src += "".join("    out[{0}, {1}] = j{0}_{1}({2})\n".format(i, j, xs)
+                   for i in range(n) for j in range(n))
+    src += "    return out\n"
+
+    wrap = njit if jit else (lambda eqn: eqn)
+    namespace = {"j{}_{}".format(i, j): wrap(jac_list[i][j])
+                 for i in range(n) for j in range(n)}
+    exec(src, namespace)
+
+    return njit(namespace["_jac"]) if jit else namespace["_jac"]
+
+
+@_memoize_eqns(maxsize=32)
+def _sympy_jacobian(eqn_list, jit=False):
+    """
+    Differentiates the lambdas or sympy expressions in eqn_list
+    symbolically and generates _jac(y, t, out) filling
+    out[i, j] = d eqn_i / d x_j in place.
+
+    Only the non-zero entries are written, so out should start as zeros
+    and can be reused between calls. Requires sympy.
+    """
+    import sympy
+
+    n = len(eqn_list)
+    syms = sympy.symbols("x1:{}".format(n+1))
+
+    try:
+        J = sympy.Matrix([eqn if isinstance(eqn, sympy.Basic) else eqn(*syms)
+                          for eqn in eqn_list]).jacobian(syms)
+    except (TypeError, AttributeError) as err:
+        raise ValueError( "Could not differentiate the equations with \
+                           sympy: {}".format(err) )
+
+    xs = ", ".join(str(sym) for sym in syms)
+    src = "def _jac(y, t, out):\n    {} = {}\n".format(
+        xs, ", ".join("y[{}]".format(i) for i in range(n)))
+    src += "".join("    out[{}, {}] = {}\n".format(i, j, sympy.pycode(J[i, j]))
+                   for i in range(n) for j in range(n) if J[i, j] != 0)
+    src += "    return out\n"
+
+    namespace = {"math": math}
+    exec(src, namespace)
+
+    if jit:
+        from numba import njit
+
+        return njit(namespace["_jac"])
+
+    return namespace["_jac"]
+
+
+@_memoize_eqns(maxsize=32)
+def _jax_rhs(eqn_list):
+    """
+    Wraps the lambdas in eqn_list as rhs(y, t) on JAX arrays. Memoized so
+    jax.experimental.ode.odeint, which jits on the function's identity,
+    reuses its compiled solver when the same system is plotted again.
+    """
+    import jax.numpy as jnp
+
+    def rhs(y, t):
+        return jnp.stack([eqn(*y) for eqn in eqn_list])
+
+    return rhs
+
+
+def _jax_solve(eqn_list, init_conds, t, rtol, atol):
+    """
+    Solves the system with JAX's jitted Dormand-Prince integrator in
+    float64. Requires jax.
+    """
+    import jax
+    import jax.numpy as jnp
+    from jax.experimental.ode import odeint as jax_odeint
+
+    with jax.enable_x64(True):
+        A = jax_odeint(_jax_rhs(_as_lambdas(eqn_list, "jax")),
+                       jnp.asarray(init_conds, dtype=jnp.float64),
+                       jnp.asarray(t),
+                       rtol=rtol, atol=atol)
+        return np.asarray(A)
+
+
+@_memoize_eqns(maxsize=32)
+def _fuse_field(eqn1, eqn2):
+    """
+    Compiles eqn1 and eqn2 into field(x, y) -> (u, v), evaluating both at
+    every point of the grid spanned by the 1D coordinates x and y in a
+    single pass, with the rows split across threads. u and v have shape
+    (len(y), len(x)) and the dtype of x; no mesh is ever allocated.
+
+    Only used with jit=True: compiling takes around a second, while
+    NumPy broadcasting evaluates a plot-sized grid in well under a
+    millisecond, so the kernel only helps on very fine grids.
+    """
+    from numba import njit, prange
+
+    e1 = njit(eqn1)
+    e2 = njit(eqn2)
+
+    @njit(parallel=True, fastmath=True)
+    def field(x, y):
+        u = np.empty((len(y), len(x)), dtype=x.dtype)
+        v = np.empty_like(u)
+        for i in prange(len(y)):
+            for j in range(len(x)):
+                u[i, j] = e1(x[j], y[i])
+                v[i, j] = e2(x[j], y[i])
+        return u, v
+
+    return field
+
+
 class PlotSystemWRTTime(object):
     """
     Designed to solve and plot NxN systems of the form:
@@ -38,18 +466,48 @@ class PlotSystemWRTTime(object):
                 x_label      - (string) Label for the x-axis
                 y_label      - (string) Label for the y-axis
                 var_labels - (list) List of dependent variable labels
-                eqn_list   - (list) List of equations
+                eqn_list   - (list) List of equations, as lambdas or sympy
+                             expressions in the symbols x1, ..., x_N
                 init_conds - (list) List of initial values
-
-    ODEs must be defined as lambda functions with x1,...,x_n as the variables.
+                method     - (string) 'lsoda' (default) uses scipy's
+                             adaptive odeint, 'rk4' uses the Numba
+                             fixed-step integrator over the same grid
+                             (falling back to odeint if it diverges or
+                             Numba can't compile the equations),
+                             'jax' uses JAX's jitted adaptive odeint
+                jit        - (bool) Compile the equations with Numba for
+                             method='lsoda', falling back to the
+                             interpreter if they can't be compiled.
+                             Off by default, since compiling costs a few
+                             tenths of a second per new system and only
+                             pays off when the same system is replotted
+                jac        - (bool) Derive an analytic Jacobian with sympy
+                             and pass it to odeint (method='lsoda' only)
+                jac_list   - (list) N lists of N lambdas, jac_list[i][j]
+                             giving d eqn_i / d x_j; used instead of jac
+                             (method='lsoda' only)
+                rtol, atol - (float) Tolerances for 'lsoda' and 'jax',
+                             1e-6 and 1e-8 by default, ample for
+                             plotting; tighten them (or set
+                             high_precision) if more accuracy is needed
+                high_precision - (bool) Use rtol=1e-13, atol=1e-20 instead;
+                             may not be combined with rtol or atol
+
+    ODEs must be defined as lambda functions (or sympy expressions) with
+    x1,...,x_n as the variables.
     They should be of the form \"eqn1 = lambda x1,x2: f(x1,x2)\"
     """
 
     def __init__(self, x_start, x_end, steps, figure_title, x_label, y_label,
-                 var_labels=[], eqn_list=[], init_conds=[]):
+                 var_labels=(), eqn_list=(), init_conds=(), method='lsoda',
+                 jit=False, jac=False, jac_list=None, rtol=None, atol=None,
+                 high_precision=False):
 
         # Parameter Check - List Lengths Should Agree
-        if  len(eqn_list) != len(init_conds):
+        if len(eqn_list) == 0:
+            raise ValueError( "At least one equation is required" )
+
+        elif len(eqn_list) != len(init_conds):
             raise ValueError( "Number of equations does not equal number of \
                                initial conditions. Equations: {}, Conditions: \
                                {}".format(len(eqn_list), len(init_conds)) )
@@ -59,79 +517,116 @@ class PlotSystemWRTTime(object):
                                of initial conditions. Labels: {}, Conditions: \
                                {}".format(len(var_labels), len(init_conds)) )
 
+        elif jac_list is not None and ( len(jac_list) != len(eqn_list) or
+                any(len(row) != len(eqn_list) for row in jac_list) ):
+            raise ValueError( "Jacobian must have one row and one column per \
+                               equation. Equations: {}".format(len(eqn_list)) )
+
+        elif method not in ('lsoda', 'rk4', 'jax'):
+            raise ValueError( "Unknown method: {}. Expected 'lsoda', 'rk4' \
+                               or 'jax'".format(method) )
+
+        elif jac_list is not None and method != 'lsoda':
+            raise ValueError( "jac_list is only used by method='lsoda'. \
+                               Method: {}".format(method) )
+
+        elif high_precision and (rtol is not None or atol is not None):
+            raise ValueError( "high_precision sets rtol and atol, pass \
+                               either it or explicit tolerances" )
+
+        if high_precision:
+            rtol, atol = 1.0e-13, 1.0e-20
+        else:
+            rtol = 1.0e-6 if rtol is None else rtol
+            atol = 1.0e-8 if atol is None else atol
+
+        eqns = _as_lambdas(eqn_list)
+
         # Define Domain
-        t = np.linspace(x_start, x_end, steps+1)
-
-        # ODE Function
-        def f(init_conds, t):
-            return [eqn(*init_conds) for eqn in eqn_list]
-
-        # ODE Solutions (Pandas Dataframe)
-        pd_solutions = pd.DataFrame( odeint( f,
-                                             init_conds,
-                                             t,
-                                             atol=1.0e-20,
-                                             rtol=1.0e-13),
-                                     columns=var_labels)
-
-        # Data Structures
-        data = [go.Scatter(x=t,
-                           y=pd_solutions[label],
-                           mode='lines',
-                           name=label,
-                           line=dict(width=5))
-                for label in var_labels]
+        t, h = _time_grid(x_start, x_end, steps)
+
+        # ODE Solutions
+        if method == 'rk4':
+            from numba.core.errors import NumbaError
+
+            try:
+                A = rk4_system(_rk4_step(eqns),
+                               tuple(float(c) for c in init_conds),
+                               t, h)
+            except NumbaError as err:
+                warnings.warn( "Numba could not compile the equations, \
+                                falling back to odeint: {}".format(err) )
+                method = 'lsoda'
+
+            # Too large a fixed step makes stiff systems diverge
+            if method == 'rk4' and not np.isfinite(A).all():
+                warnings.warn( "RK4 diverged with step {}, falling back \
+                                to odeint".format(h) )
+                method = 'lsoda'
+
+        if method == 'lsoda':
+            # ODE Function - odeint copies the result, so one buffer
+            # is reused for every step
+            _rhs = _fuse_rhs(eqns, jit=jit)
+            _buf = np.empty(len(eqn_list))
+
+            # Compile up front so lambdas Numba can't type fall back
+            # to the interpreter instead of failing inside odeint
+            if jit:
+                from numba.core.errors import NumbaError
+
+                try:
+                    _rhs(np.asarray(init_conds, dtype=np.float64), t[0], _buf)
+                except NumbaError as err:
+                    warnings.warn( "Numba could not compile the equations, \
+                                    using the interpreter: {}".format(err) )
+                    jit = False
+                    _rhs = _fuse_rhs(eqns)
+
+            def f(y, t):
+                _rhs(y, t, _buf)
+                return _buf
+
+            # Jacobian - LSODA falls back to finite differences without it
+            if jac_list is not None or jac:
+                if jac_list is not None:
+                    _jac = _fuse_jac(tuple(tuple(row) for row in jac_list),
+                                     jit=jit)
+                else:
+                    _jac = _sympy_jacobian(tuple(eqn_list), jit=jit)
+                _jbuf = np.zeros((len(eqn_list), len(eqn_list)))
+
+                def Dfun(y, t):
+                    return _jac(y, t, _jbuf)
+            else:
+                Dfun = None
+
+            A = odeint(f, init_conds, t, Dfun=Dfun, col_deriv=False,
+                       atol=atol, rtol=rtol, mxstep=5000)
+
+        elif method == 'jax':
+            A = _jax_solve(eqn_list, init_conds, t, rtol, atol)
+
+        # Column-major so each plotted column A[:, i] is contiguous
+        A = np.asfortranarray(A)
+
+        # Data Structures - one column of A per label, drawn with WebGL
+        # only once the trajectory is long enough for SVG to struggle
+        Trace = go.Scattergl if steps > 2000 else go.Scatter
+        data = [Trace(x=t,
+                      y=A[:, i],
+                      mode='lines',
+                      name=label,
+                      line=dict(width=5))
+                for i, label in enumerate(var_labels)]
 
         # Figure Layout
-        layout = go.Layout(
-            title=figure_title,
-            autosize=True,
-
-            font=dict(
-                size=22,
-            ),
-
-            xaxis=dict(
-                title=x_label,
-                showgrid=False,
-                titlefont=dict(
-                    size=20,
-                ),
-                tickfont=dict(
-                    size=14,
-                ),
-                zerolinewidth=1,
-                ticks='outside',
-            ),
-
-            yaxis=dict(
-                title=y_label,
-                showgrid=False,
-                titlefont=dict(
-                    size=20,
-                ),
-                tickfont=dict(
-                    size=14,
-                ),
-                zerolinewidth=1,
-                ticks='inside',
-            ),
-
-            legend=dict(
-                x=1,
-                y=1,
-                bordercolor='#404040',
-                bgcolor="rgba(255, 255, 255, 0.5)",
-                borderwidth=1,
-                font=dict(size=16),
-                xanchor='right',
-                yanchor='top',
-            ),
-        )
-
-        # Create Figure and Plot
+        layout = _make_layout(figure_title, x_label, y_label, legend=_LEGEND)
+
+        # Create Figure and Plot - written locally, plotly.js from the CDN
         fig = go.Figure(data=data, layout=layout)
-        py.plotly.plot(fig, filename=figure_title)
+        pio.write_html(fig, file=_html_filename(figure_title),
+                       include_plotlyjs='cdn', validate=False, auto_open=True)
 
     @classmethod
     def demo1(cls):
@@ -268,6 +763,8 @@ class PhasePlaneTwoByTwoWithCarry(object):
                       b - Interaction coefficient for the second equation
                       eqn1 - (lambda) First equation of the system
                       eqn2 - (lambda) Second equation of the system
+                      jit  - (bool) Evaluate the vector field with Numba
+                             rather than NumPy broadcasting
                       
         ODEs must be written as lambda functions with x1,...,x_n as the variables.
         They should be of the form \"eqn1 = lambda x1,x2: f(x1,x2)\"
@@ -275,89 +772,66 @@ class PhasePlaneTwoByTwoWithCarry(object):
     """
 
     def __init__(self, x_start, x_end, x_steps, y_start, y_end, y_steps, figure_title, 
-                 x_label, y_label, carry1, carry2, a, b, eqn1, eqn2):
+                 x_label, y_label, carry1, carry2, a, b, eqn1, eqn2, jit=False):
         'Constructor for PhasePlaneTwoByTwoWithCarry'
 
-        e1 = [ ( (carry1-a*carry2)/(1-a*b) ), 
-               ( (carry2-b*carry1)/(1-a*b) ) ]
-        e2 = [ 0, carry2 ]
-        e3 = [ carry1, 0 ] 
-        e4 = [ 0, 0 ]
+        # Coexistence equilibrium is undefined when the nullclines are parallel
+        denom = 1 - a*b
+        if abs(denom) < 1e-15:
+            raise ValueError( "Degenerate equilibrium, a*b must not equal 1. \
+                               a: {}, b: {}".format(a, b) )
+        inv = 1/denom
+
+        # Equilibria, one (x, y) row each
+        E = np.array([ [ (carry1-a*carry2)*inv,
+                         (carry2-b*carry1)*inv ],
+                       [ 0, carry2 ],
+                       [ carry1, 0 ],
+                       [ 0, 0 ] ])
 
         if (x_start == 0) : x_start = 0.01
         if (y_start == 0) : y_start = 0.01
 
-        x_coords = np.linspace(x_star, x_end, x_steps)
-        y_coords = np.linspace(y_start, y_end, y_steps) 
+        # float32 is ample for a vector field drawn at screen resolution
+        x_coords = np.linspace(x_start, x_end, x_steps, dtype=np.float32)
+        y_coords = np.linspace(y_start, y_end, y_steps, dtype=np.float32)
 
-        x_mesh, y_mesh = np.meshgrid(x_coords, y_coords)
+        # Vector field with NumPy broadcasting, or in one compiled pass
+        # if requested and Numba can compile the lambdas
+        if jit:
+            from numba.core.errors import NumbaError
 
-        u = eqn1(x_mesh, y_mesh)
-        v = eqn2(x_mesh, y_mesh)
+            try:
+                u, v = _fuse_field(eqn1, eqn2)(x_coords, y_coords)
+            except NumbaError as err:
+                warnings.warn( "Numba could not compile the equations, \
+                                using NumPy: {}".format(err) )
+                jit = False
+
+        if not jit:
+            x_mesh = x_coords[np.newaxis, :]
+            y_mesh = y_coords[:, np.newaxis]
+            u = np.broadcast_to(eqn1(x_mesh, y_mesh), (y_steps, x_steps))
+            v = np.broadcast_to(eqn2(x_mesh, y_mesh), (y_steps, x_steps))
 
         fig = ff.create_streamline(x_coords, y_coords, u, v, 
                                     arrow_scale=( (x_end - x_start)/60 ), 
                                     density=1.1,
                                     name='Streamline')
 
-        p1 = go.Scatter(x=[e1[0]], y=[e1[1]],
-                        mode='markers',
-                        marker=go.Marker(size=14),
-                        name='Equilibrium 1')
-        p2 = go.Scatter(x=[e2[0]], y=[e2[1]],
-                        mode='markers',
-                        marker=go.Marker(size=14),
-                        name='Equilibrium 2')
-        p3 = go.Scatter(x=[e3[0]], y=[e3[1]],
-                        mode='markers',
-                        marker=go.Marker(size=14),
-                        name='Equilibrium 3')
-        p4 = go.Scatter(x=[e4[0]], y=[e4[1]],
-                        mode='markers',
-                        marker=go.Marker(size=14),
-                        name='Equilibrium 4')
-        
-        fig['data'].append(p1)
-        fig['data'].append(p2)
-        fig['data'].append(p3)
-        fig['data'].append(p4)
-
-        fig['layout'] = go.Layout(
-            title = figure_title,
-            autosize = True,
-
-            font = dict(
-                size = 22,
-            ),
-
-            xaxis = dict(
-                title = x_label,
-                showgrid = False,
-                titlefont=dict(
-                    size=20,
-                ),
-                tickfont=dict(
-                    size=14,
-                ),
-                zerolinewidth=1,
-                ticks = 'outside',
-            ),
-
-            yaxis = dict(
-                title = y_label,
-                showgrid = False,
-                titlefont=dict(
-                    size=20,
-                ),
-                tickfont=dict(
-                    size=14,
-                ),
-                zerolinewidth=1,
-                ticks = 'inside',
-            ),
-        )
-
-        py.plotly.plot(fig, filename=figure_title)
+        # Equilibria as one labelled trace
+        fig.add_trace(go.Scatter(x=E[:, 0], y=E[:, 1],
+                                 mode='markers+text',
+                                 text=['Equilibrium {}'.format(i+1)
+                                       for i in range(len(E))],
+                                 textposition='top right',
+                                 marker=dict(size=14),
+                                 name='Equilibria'))
+
+        fig['layout'] = _make_layout(figure_title, x_label, y_label)
+
+        pio.write_html(fig, file=_html_filename(figure_title),
+                       include_plotlyjs='cdn', validate=False, auto_open=True)
 
     @classmethod
     def demo(cls):